@@ -0,0 +1,84 @@
+"""
+Benchmark de arranque.
+
+Mide, cada uno en un proceso nuevo:
+  - tiempo de import de python-project/proyectin.py (CLI),
+  - tiempo de import de main-flask.py, tiempo hasta la primera respuesta
+    de `/` y tiempo hasta que el grafo está listo, con y sin BACKGROUND_LOAD.
+
+Uso (desde el directorio que contiene el CSV):
+    python ../backend/bench_startup.py
+"""
+import json
+import os
+import subprocess
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+CLI_DIR = os.path.join(os.path.dirname(HERE), "python-project")
+RUNS = 3
+
+CLI_PROBE = """
+import sys, time, json
+sys.path.insert(0, {cli_dir!r})
+t0 = time.perf_counter()
+import proyectin
+print(json.dumps({{"import": time.perf_counter() - t0}}))
+"""
+
+SERVER_PROBE = """
+import sys, time, json, importlib.util, contextlib, io
+sys.path.insert(0, {backend_dir!r})
+t0 = time.perf_counter()
+spec = importlib.util.spec_from_file_location("main_flask", {app_path!r})
+module = importlib.util.module_from_spec(spec)
+with contextlib.redirect_stdout(io.StringIO()):
+    spec.loader.exec_module(module)
+t_import = time.perf_counter() - t0
+client = module.app.test_client()
+t_first = t_ready = None
+while t_ready is None:
+    response = client.get("/")
+    now = time.perf_counter() - t0
+    if t_first is None:
+        t_first = now
+    if response.get_json().get("status") == "online":
+        t_ready = now
+    else:
+        time.sleep(0.01)
+print(json.dumps({{"import": t_import, "first_request": t_first, "ready": t_ready}}))
+"""
+
+
+def run_probe(code, env=None):
+    out = subprocess.run(
+        [sys.executable, "-c", code],
+        env={**os.environ, **(env or {})},
+        capture_output=True, text=True, check=True,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def best_of(code, env=None):
+    runs = [run_probe(code, env) for _ in range(RUNS)]
+    return {key: min(run[key] for run in runs) for key in runs[0]}
+
+
+def main():
+    cli = best_of(CLI_PROBE.format(cli_dir=CLI_DIR))
+    print(f"CLI proyectin.py      import {cli['import'] * 1000:8.1f} ms")
+
+    server_code = SERVER_PROBE.format(
+        backend_dir=HERE, app_path=os.path.join(HERE, "main-flask.py")
+    )
+    for mode in ("0", "1"):
+        res = best_of(server_code, {"BACKGROUND_LOAD": mode})
+        print(
+            f"Flask BACKGROUND_LOAD={mode}  import {res['import'] * 1000:8.1f} ms"
+            f" | primera respuesta {res['first_request'] * 1000:8.1f} ms"
+            f" | grafo listo {res['ready'] * 1000:8.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+import zlib
+from array import array
+
+import numpy as np
+import pandas as pd
+
+# Columnas de texto largo: se guardan comprimidas y se decodifican solo al leerlas
+TEXT_COLUMNS = (
+    "side_effects",
+    "medical_condition_description",
+    "related_drugs",
+    "brand_names",
+)
+# Columnas con un valor distinto por fila: codificarlas por diccionario no ahorra
+# nada, se guardan como texto UTF-8 sin comprimir
+PLAIN_COLUMNS = (
+    "generic_name",
+    "drug_link",
+    "medical_condition_url",
+)
+KEY_COLUMN = "drug_name"
+
+
+class _CategoryColumn:
+    """Columna codificada por diccionario: un código entero por fila."""
+
+    def __init__(self):
+        self.categories = []
+        self._lookup = {}
+        self.codes = array("i")
+
+    def append(self, value):
+        if value is None:
+            self.codes.append(-1)
+            return
+        code = self._lookup.get(value)
+        if code is None:
+            code = len(self.categories)
+            self._lookup[value] = code
+            self.categories.append(value)
+        self.codes.append(code)
+
+    def freeze(self):
+        del self._lookup
+        self.codes = np.frombuffer(self.codes, dtype=np.int32) if len(self.codes) else np.empty(0, dtype=np.int32)
+        return self
+
+    def get(self, row):
+        code = self.codes[row]
+        return self.categories[code] if code >= 0 else None
+
+    def rows_where(self, predicate):
+        """Filas cuyo valor cumple `predicate` (evaluado una vez por categoría)."""
+        matching = [code for code, value in enumerate(self.categories) if predicate(value)]
+        if not matching:
+            return np.empty(0, dtype=np.int64)
+        return np.flatnonzero(np.isin(self.codes, matching))
+
+    def groups(self):
+        """Diccionario categoría -> ids de fila (ordenados)."""
+        order = np.argsort(self.codes, kind="stable")
+        sorted_codes = self.codes[order]
+        bounds = np.flatnonzero(np.diff(sorted_codes)) + 1
+        result = {}
+        for chunk in np.split(order, bounds):
+            if len(chunk) and self.codes[chunk[0]] >= 0:
+                result[self.categories[self.codes[chunk[0]]]] = chunk
+        return result
+
+
+class _TextColumn:
+    """Texto en un único buffer con offsets; comprimido con zlib si `compress`."""
+
+    def __init__(self, compress=True):
+        self.compress = compress
+        self._blob = bytearray()
+        self.offsets = array("q", [0])
+        self.nulls = array("b")
+
+    def append(self, value):
+        if value is not None:
+            data = value.encode("utf-8")
+            self._blob += zlib.compress(data) if self.compress else data
+        self.offsets.append(len(self._blob))
+        self.nulls.append(value is None)
+
+    def freeze(self):
+        self.blob = bytes(self._blob)
+        del self._blob
+        self.offsets = np.frombuffer(self.offsets, dtype=np.int64)
+        self.nulls = np.frombuffer(self.nulls, dtype=np.bool_) if len(self.nulls) else np.empty(0, dtype=np.bool_)
+        return self
+
+    def get(self, row):
+        if self.nulls[row]:
+            return None
+        start, end = self.offsets[row], self.offsets[row + 1]
+        data = self.blob[start:end]
+        return (zlib.decompress(data) if self.compress else data).decode("utf-8")
+
+
+class _NumericColumn:
+    """Columna numérica; NaN representa valores nulos."""
+
+    def __init__(self):
+        self.values = array("d")
+
+    def append(self, value):
+        self.values.append(float("nan") if value is None else float(value))
+
+    def freeze(self):
+        self.values = np.frombuffer(self.values, dtype=np.float64) if len(self.values) else np.empty(0)
+        return self
+
+    def get(self, row):
+        value = self.values[row]
+        return None if np.isnan(value) else float(value)
+
+
+class DrugTableBuilder:
+    """Acumula filas (ya limpias y sin duplicados) y produce un DrugTable."""
+
+    _COLUMN_TYPES = {
+        "category": _CategoryColumn,
+        "text": _TextColumn,
+        "plain": lambda: _TextColumn(compress=False),
+        "numeric": _NumericColumn,
+    }
+
+    def __init__(self, schema):
+        # schema: lista de (columna, tipo) con tipo en {"category", "text", "plain", "numeric"}
+        self.schema = [(col, kind) for col, kind in schema if col != KEY_COLUMN]
+        self.names = []
+        self._columns = {
+            col: self._COLUMN_TYPES[kind]() for col, kind in self.schema
+        }
+
+    @staticmethod
+    def schema_for(df):
+        """Deduce el tipo de almacenamiento de cada columna de un DataFrame."""
+        schema = []
+        for col in df.columns:
+            if col in TEXT_COLUMNS:
+                schema.append((col, "text"))
+            elif col in PLAIN_COLUMNS:
+                schema.append((col, "plain"))
+            elif pd.api.types.is_numeric_dtype(df[col]):
+                schema.append((col, "numeric"))
+            else:
+                schema.append((col, "category"))
+        return schema
+
+    def append_frame(self, df):
+        self.names.extend(df[KEY_COLUMN].tolist())
+        for col, _ in self.schema:
+            column = self._columns[col]
+            for value in df[col].tolist():
+                column.append(None if pd.isna(value) else value)
+
+    def build(self):
+        return DrugTable(self.names, {col: self._columns[col].freeze() for col, _ in self.schema})
+
+
+class DrugTable:
+    """
+    Tabla columnar compartida de medicamentos. Cada fila se identifica por
+    un id entero; el grafo y los endpoints guardan solo ese id.
+    """
+
+    def __init__(self, names, columns):
+        self.names = names
+        self.index = {name: row for row, name in enumerate(names)}
+        self.columns = columns
+
+    @classmethod
+    def from_frame(cls, df):
+        builder = DrugTableBuilder(DrugTableBuilder.schema_for(df))
+        builder.append_frame(df)
+        return builder.build()
+
+    def __len__(self):
+        return len(self.names)
+
+    def row_of(self, drug_name):
+        return self.index.get(drug_name)
+
+    def value(self, row, column):
+        if column == KEY_COLUMN:
+            return self.names[row]
+        return self.columns[column].get(row)
+
+    def record(self, row):
+        """Fila completa como dict (decodifica los textos largos)."""
+        data = {KEY_COLUMN: self.names[row]}
+        for col, column in self.columns.items():
+            data[col] = column.get(row)
+        return data
+
+    def records(self, rows):
+        return [self.record(int(row)) for row in rows]
+
+    def rows_where(self, column, predicate):
+        return self.columns[column].rows_where(predicate)
+
+    def groups(self, column):
+        return self.columns[column].groups()
+
+    def all_rows(self):
+        return np.arange(len(self.names))
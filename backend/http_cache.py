@@ -0,0 +1,135 @@
+import gzip
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+try:
+    import brotli
+except ImportError:  # brotli es opcional: sin él solo se sirve gzip
+    brotli = None
+
+# Por debajo de este tamaño no compensa comprimir
+MIN_COMPRESS_BYTES = 512
+
+
+def dataset_version(path):
+    """Versión del dataset a partir de ruta, tamaño y fecha de modificación."""
+    stat = os.stat(path)
+    raw = f"{os.path.abspath(path)}:{stat.st_size}:{stat.st_mtime_ns}"
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+
+def response_etag(url):
+    """Parte del ETag propia de cada URL (ruta + query)."""
+    return hashlib.sha1(url.encode("utf-8")).hexdigest()[:12]
+
+
+def choose_encoding(accept_encoding):
+    """Elige 'br', 'gzip' o None según la cabecera Accept-Encoding."""
+    accepted = set()
+    for part in (accept_encoding or "").split(","):
+        token, _, params = part.strip().partition(";")
+        if params.replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            continue
+        accepted.add(token.strip().lower())
+    if brotli is not None and ("br" in accepted or "*" in accepted):
+        return "br"
+    if "gzip" in accepted or "*" in accepted:
+        return "gzip"
+    return None
+
+
+class CachedBody:
+    """Cuerpo ya serializado junto con sus variantes comprimidas."""
+
+    def __init__(self, status, body, mimetype):
+        self.status = status
+        self.mimetype = mimetype
+        self.bodies = {None: body}
+        if len(body) >= MIN_COMPRESS_BYTES:
+            self.bodies["gzip"] = gzip.compress(body, compresslevel=6)
+            if brotli is not None:
+                self.bodies["br"] = brotli.compress(body, quality=5)
+
+    @property
+    def size(self):
+        return sum(len(b) for b in self.bodies.values())
+
+    def body_for(self, encoding):
+        """Devuelve (cuerpo, encoding usado); si no hay variante, sin comprimir."""
+        if encoding in self.bodies:
+            return self.bodies[encoding], encoding
+        return self.bodies[None], None
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+
+
+class ResponseCache:
+    """
+    LRU acotada (por entradas y por bytes) de respuestas pre-serializadas.
+    Las peticiones idénticas en curso se agrupan: solo la primera ejecuta
+    `compute`, las demás esperan y reciben el mismo resultado.
+    """
+
+    def __init__(self, max_entries=2048, max_bytes=64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def get_or_compute(self, key, compute):
+        """`compute()` debe devolver un CachedBody; solo se guardan los 200."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = _Flight()
+
+        if not leader:
+            flight.done.wait()
+            if flight.result is not None:
+                return flight.result
+            # El líder falló: lo intentamos por nuestra cuenta
+            return self.get_or_compute(key, compute)
+
+        try:
+            flight.result = compute()
+            if flight.result.status == 200:
+                self._store(key, flight.result)
+            return flight.result
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            flight.done.set()
+
+    def _store(self, key, entry):
+        with self._lock:
+            if entry.size > self.max_bytes:
+                return
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old.size
+            self._entries[key] = entry
+            self._bytes += entry.size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.size
@@ -0,0 +1,194 @@
+import os
+
+import pandas as pd
+
+from drug_table import DrugTableBuilder, KEY_COLUMN, PLAIN_COLUMNS, TEXT_COLUMNS
+
+# Esquema declarado del dataset (orden de columnas de salida)
+NUMERIC_COLUMNS = ("rating", "no_of_reviews")
+SCHEMA_COLUMNS = (
+    "drug_name",
+    "medical_condition",
+    "side_effects",
+    "generic_name",
+    "drug_classes",
+    "brand_names",
+    "activity",
+    "rx_otc",
+    "pregnancy_category",
+    "csa",
+    "alcohol",
+    "related_drugs",
+    "medical_condition_description",
+    "rating",
+    "no_of_reviews",
+    "drug_link",
+    "medical_condition_url",
+)
+REQUIRED_COLUMNS = ("drug_name", "medical_condition", "drug_classes")
+
+# Marcadores de nulo por defecto de pandas.read_csv; se aplican igual a
+# CSV, Parquet y Arrow (tras quitar espacios)
+NA_VALUES = (
+    "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan",
+    "1.#IND", "1.#QNAN", "<NA>", "N/A", "NA", "NULL", "NaN", "None",
+    "n/a", "nan", "null",
+)
+
+CHUNK_SIZE = 50_000
+MAX_REPORTED_ERRORS = 1000
+
+
+class IngestionError(Exception):
+    """Error de carga con el detalle de las filas inválidas."""
+
+    def __init__(self, source, errors, total_errors=None):
+        self.source = source
+        self.errors = errors  # lista de (fila, columna, mensaje)
+        self.total_errors = total_errors if total_errors is not None else len(errors)
+        lines = [f"{self.total_errors} error(es) cargando '{source}':"]
+        for row, column, message in errors[:20]:
+            lines.append(f"  fila {row}, columna '{column}': {message}")
+        if self.total_errors > 20:
+            lines.append(f"  ... y {self.total_errors - 20} más")
+        super().__init__("\n".join(lines))
+
+
+def _storage_kind(column):
+    if column in TEXT_COLUMNS:
+        return "text"
+    if column in PLAIN_COLUMNS:
+        return "plain"
+    if column in NUMERIC_COLUMNS:
+        return "numeric"
+    return "category"
+
+
+def _source_format(path):
+    ext = os.path.splitext(path)[1].lower()
+    if ext in (".parquet", ".pq"):
+        return "parquet"
+    if ext in (".arrow", ".feather", ".ipc"):
+        return "arrow"
+    return "csv"
+
+
+def _source_columns(path, fmt):
+    if fmt == "csv":
+        return list(pd.read_csv(path, nrows=0).columns)
+    import pyarrow.parquet as pq
+    import pyarrow.ipc as ipc
+    if fmt == "parquet":
+        return pq.ParquetFile(path).schema_arrow.names
+    with ipc.open_file(path) as reader:
+        return reader.schema.names
+
+
+def _iter_chunks(path, fmt, columns, chunk_size):
+    """
+    Recorre la fuente por bloques leyendo solo `columns`, todo como texto.
+    Produce (bloque, fracción leída de la fuente entre 0 y 1).
+    """
+    if fmt == "csv":
+        total_bytes = max(os.path.getsize(path), 1)
+        handle = open(path, "rb")
+        reader = pd.read_csv(
+            handle,
+            usecols=columns,
+            dtype={col: "string" for col in columns},
+            keep_default_na=False,
+            na_values=list(NA_VALUES),
+            chunksize=chunk_size,
+        )
+        with handle, reader:
+            for chunk in reader:
+                yield chunk, min(handle.tell() / total_bytes, 1.0)
+        return
+
+    import pyarrow.parquet as pq
+    import pyarrow.ipc as ipc
+    if fmt == "parquet":
+        source = pq.ParquetFile(path)
+        total_rows = max(source.metadata.num_rows, 1)
+        rows_read = 0
+        for batch in source.iter_batches(batch_size=chunk_size, columns=columns):
+            rows_read += batch.num_rows
+            yield batch.to_pandas(), rows_read / total_rows
+    else:
+        with ipc.open_file(path) as reader:
+            total_batches = max(reader.num_record_batches, 1)
+            for i in range(reader.num_record_batches):
+                yield reader.get_batch(i).select(columns).to_pandas(), (i + 1) / total_batches
+
+
+def _normalize_text(series):
+    """Quita espacios y convierte los marcadores de nulo en NA."""
+    series = series.astype("string").str.strip()
+    return series.mask(series.isin(NA_VALUES))
+
+
+def load_drug_table(path, chunk_size=CHUNK_SIZE, on_chunk=None):
+    """
+    Carga el dataset (CSV, Parquet o Arrow IPC) por bloques y construye un
+    DrugTable. Normaliza espacios, descarta filas sin nombre/condición/clase
+    y deduplica por `drug_name` (se queda la primera aparición).
+    Lanza IngestionError con el detalle de cada fila inválida.
+    `on_chunk(filas_leidas, fraccion)` se llama tras cada bloque para informar
+    progreso; `fraccion` es la parte de la fuente ya leída (0 a 1).
+    """
+    fmt = _source_format(path)
+    available = _source_columns(path, fmt)
+
+    missing = [col for col in REQUIRED_COLUMNS if col not in available]
+    if missing:
+        raise IngestionError(path, [(0, col, "columna obligatoria ausente") for col in missing])
+
+    columns = [col for col in SCHEMA_COLUMNS if col in available]
+    builder = DrugTableBuilder([(col, _storage_kind(col)) for col in columns])
+
+    seen = set()
+    errors = []
+    total_errors = 0
+    row_offset = 0
+    dropped = 0
+
+    for chunk, fraction in _iter_chunks(path, fmt, columns, chunk_size):
+        # Número de fila de datos en la fuente (1 = primera fila tras la cabecera)
+        chunk.index = pd.RangeIndex(row_offset + 1, row_offset + 1 + len(chunk))
+        row_offset += len(chunk)
+
+        for col in columns:
+            if col in NUMERIC_COLUMNS:
+                raw = chunk[col]
+                if raw.dtype == object or pd.api.types.is_string_dtype(raw):
+                    raw = _normalize_text(raw)
+                parsed = pd.to_numeric(raw, errors="coerce")
+                invalid = parsed.isna() & raw.notna()
+                for row, value in raw[invalid].items():
+                    total_errors += 1
+                    if len(errors) < MAX_REPORTED_ERRORS:
+                        errors.append((row, col, f"valor numérico inválido: {value!r}"))
+                chunk[col] = parsed.astype("float64")
+            else:
+                chunk[col] = _normalize_text(chunk[col])
+
+        before = len(chunk)
+        chunk = chunk.dropna(subset=list(REQUIRED_COLUMNS))
+        chunk = chunk.drop_duplicates(subset=[KEY_COLUMN])
+        chunk = chunk[~chunk[KEY_COLUMN].isin(seen)]
+        dropped += before - len(chunk)
+
+        if total_errors:
+            # Seguimos validando el resto, pero ya no se construye la tabla
+            continue
+
+        seen.update(chunk[KEY_COLUMN].tolist())
+        builder.append_frame(chunk)
+        if on_chunk:
+            on_chunk(row_offset, fraction)
+
+    if total_errors:
+        raise IngestionError(path, errors, total_errors)
+
+    print(f"{len(builder.names)} medicamentos cargados ({dropped} filas descartadas o duplicadas).")
+    return builder.build()
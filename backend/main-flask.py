@@ -1,15 +1,30 @@
-import json
-import pandas as pd
+import os
+import threading
+import traceback
+from functools import wraps
 import networkx as nx
+import numpy as np
 import itertools
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, make_response
 from flask_cors import CORS
 
+from http_cache import CachedBody, ResponseCache, choose_encoding, dataset_version, response_etag
+from ingest import load_drug_table
+from neighbors import NeighborIndex
+
 # --- CONFIGURACIÓN Y CONSTANTES ---
 DATA_FILE = "drugs_side_effects_drugs_com.csv"
 SIMILARITY_SAME_CONDITION_AND_CLASS = 1.0
 SIMILARITY_SAME_CONDITION_ONLY = 0.7
 SIMILARITY_SAME_CLASS_ONLY = 0.5
+# Con BACKGROUND_LOAD=1 (por defecto) el servidor arranca de inmediato y el grafo
+# se construye en un hilo; mientras tanto los endpoints responden 503. Si la carga
+# falla el proceso termina, igual que en el arranque bloqueante.
+BACKGROUND_LOAD = os.environ.get("BACKGROUND_LOAD", "1") == "1"
+RETRY_AFTER_SECONDS = 5
+NEIGHBORHOOD_MAX_DRUGS = 50
+RESPONSE_CACHE_MAX_ENTRIES = 2048
+RESPONSE_CACHE_MAX_BYTES = 64 * 1024 * 1024
 
 # --- INICIALIZACIÓN DE FLASK ---
 app = Flask(__name__)
@@ -19,89 +34,174 @@ CORS(app)
 # Contexto Global para almacenar datos en memoria
 global_context = {
     "G": None,
-    "df": None,
+    "table": None,
+    "neighbors": None, # Vecinos por id de fila (CSR) para consultas multi-medicamento
     "search_index": {},
-    "filter_cache": {} # Caché para optimización
+    "filter_cache": {}, # Caché para optimización
+    "status": "loading", # loading | online | error
+    "progress": {"stage": "inicio", "percent": 0},
+    "error": None,
+    "dataset_version": None # Se usa como ETag de las respuestas
 }
 
+# Caché HTTP de respuestas serializadas (y comprimidas) por ruta
+response_cache = ResponseCache(RESPONSE_CACHE_MAX_ENTRIES, RESPONSE_CACHE_MAX_BYTES)
+
+def set_progress(stage, percent, **extra):
+    global_context["progress"] = {"stage": stage, "percent": int(percent), **extra}
+
 # --- LÓGICA DE NEGOCIO ---
 def build_graph():
     """Carga datos y construye el grafo incluyendo la razón de la conexión."""
     print("--- INICIANDO SERVIDOR (FLASK) ---")
     print(f"Cargando {DATA_FILE}...")
     
-    try:
-        df = pd.read_csv(DATA_FILE)
-        cols_to_check = ['drug_name', 'medical_condition', 'drug_classes']
-        df = df.dropna(subset=cols_to_check)
-        
-        for col in df.select_dtypes(include=['object']):
-            df[col] = df[col].str.strip()
-
-        df = df.drop_duplicates(subset=['drug_name'])
-        df_clean = df.copy()
-        df = df.set_index('drug_name')
-
-        G = nx.Graph()
-        # Agregar nodos
-        for drug_name, row in df.iterrows():
-            row_data = row.where(pd.notnull(row), None).to_dict()
-            G.add_node(drug_name, **row_data)
-
-        condition_map = df.groupby("medical_condition").groups
-        class_map = df.groupby("drug_classes").groups
-        
-        edges_to_add = {}
-        edge_reasons = {} # Diccionario para guardar el texto de la coincidencia
-
-        print("Calculando relaciones...")
-        
-        # Pase 1: misma condición
-        for condition, drugs in condition_map.items():
-            for drug1, drug2 in itertools.combinations(drugs, 2):
-                pair = tuple(sorted((drug1, drug2)))
-                edges_to_add[pair] = SIMILARITY_SAME_CONDITION_ONLY
-                edge_reasons[pair] = f"Condición: '{condition}'"
-
-        # Pase 2: misma clase
-        for d_class, drugs in class_map.items():
-            for drug1, drug2 in itertools.combinations(drugs, 2):
-                pair = tuple(sorted((drug1, drug2)))
-                if pair in edges_to_add:
-                    edges_to_add[pair] = SIMILARITY_SAME_CONDITION_AND_CLASS
-                    # Si ya existía, agregamos la clase al texto
-                    edge_reasons[pair] += f" y Clase: '{d_class}'"
-                else:
-                    edges_to_add[pair] = SIMILARITY_SAME_CLASS_ONLY
-                    edge_reasons[pair] = f"Clase: '{d_class}'"
-
-        # Añadir aristas con atributos
-        for (drug1, drug2), similarity in edges_to_add.items():
-            cost = 1.1 - similarity
-            reason_text = edge_reasons.get((drug1, drug2), "Desconocido")
-            # Guardamos 'reason' en la arista
-            G.add_edge(drug1, drug2, similarity=similarity, cost=cost, reason=reason_text)
-
-        print(f"Grafo construido: {G.number_of_nodes()} nodos, {G.number_of_edges()} aristas.")
-        
-        search_idx = {name.lower(): name for name in df.index}
-        
-        return G, df_clean, search_idx
+    # Lectura por bloques con esquema declarado; cualquier fila inválida
+    # detiene el arranque con un IngestionError detallado.
+    set_progress("datos", 0)
+    table = load_drug_table(
+        DATA_FILE,
+        on_chunk=lambda rows_read, fraction: set_progress("datos", 40 * fraction, rows_read=rows_read)
+    )
+    set_progress("relaciones", 40)
+
+    G = nx.Graph()
+    # Agregar nodos: solo el id de fila, los atributos viven en la tabla
+    for row, drug_name in enumerate(table.names):
+        G.add_node(drug_name, row=row)
+
+    condition_map = table.groups("medical_condition")
+    class_map = table.groups("drug_classes")
+    names = table.names
+    
+    edges_to_add = {}
+    edge_reasons = {} # Diccionario para guardar el texto de la coincidencia
 
-    except FileNotFoundError:
-        print("ERROR: No se encontró el archivo CSV.")
-        return None, None, None
-    except Exception as e:
-        print(f"Error inesperado cargando datos: {e}")
-        return None, None, None
+    print("Calculando relaciones...")
+    
+    total_groups = max(len(condition_map) + len(class_map), 1)
+
+    # Pase 1: misma condición
+    for done, (condition, drugs) in enumerate(condition_map.items()):
+        set_progress("relaciones", 40 + 30 * done / total_groups)
+        for row1, row2 in itertools.combinations(drugs, 2):
+            pair = tuple(sorted((names[row1], names[row2])))
+            edges_to_add[pair] = SIMILARITY_SAME_CONDITION_ONLY
+            edge_reasons[pair] = f"Condición: '{condition}'"
+
+    # Pase 2: misma clase
+    for done, (d_class, drugs) in enumerate(class_map.items(), start=len(condition_map)):
+        set_progress("relaciones", 40 + 30 * done / total_groups)
+        for row1, row2 in itertools.combinations(drugs, 2):
+            pair = tuple(sorted((names[row1], names[row2])))
+            if pair in edges_to_add:
+                edges_to_add[pair] = SIMILARITY_SAME_CONDITION_AND_CLASS
+                # Si ya existía, agregamos la clase al texto
+                edge_reasons[pair] += f" y Clase: '{d_class}'"
+            else:
+                edges_to_add[pair] = SIMILARITY_SAME_CLASS_ONLY
+                edge_reasons[pair] = f"Clase: '{d_class}'"
+
+    # Añadir aristas con atributos
+    total_edges = max(len(edges_to_add), 1)
+    for done, ((drug1, drug2), similarity) in enumerate(edges_to_add.items()):
+        if done % 10000 == 0:
+            set_progress("aristas", 70 + 30 * done / total_edges)
+        cost = 1.1 - similarity
+        reason_text = edge_reasons.get((drug1, drug2), "Desconocido")
+        # Guardamos 'reason' en la arista
+        G.add_edge(drug1, drug2, similarity=similarity, cost=cost, reason=reason_text)
+
+    print(f"Grafo construido: {G.number_of_nodes()} nodos, {G.number_of_edges()} aristas.")
+
+    # Índice de vecinos por id de fila, ordenado, para intersecciones/uniones rápidas
+    index = table.index
+    neighbor_idx = NeighborIndex.from_edges(
+        len(table),
+        [index[d1] for d1, _ in edges_to_add],
+        [index[d2] for _, d2 in edges_to_add],
+        list(edges_to_add.values())
+    )
+    
+    search_idx = {name.lower(): name for name in table.names}
+    
+    return G, table, search_idx, neighbor_idx
 
 # --- CARGA INICIAL ---
-G, df, search_idx = build_graph()
-global_context["G"] = G
-global_context["df"] = df
-global_context["search_index"] = search_idx
+def load_context():
+    """Construye el grafo y lo publica en global_context al terminar."""
+    try:
+        G, table, search_idx, neighbor_idx = build_graph()
+    except Exception as e:
+        global_context["error"] = str(e)
+        global_context["status"] = "error"
+        if not BACKGROUND_LOAD:
+            raise
+        # Desde el hilo no basta con lanzar: sin datos el servidor no debe seguir vivo
+        traceback.print_exc()
+        print("ERROR: no se pudieron cargar los datos, deteniendo el servidor.", flush=True)
+        os._exit(1)
+    global_context["G"] = G
+    global_context["table"] = table
+    global_context["search_index"] = search_idx
+    global_context["neighbors"] = neighbor_idx
+    global_context["dataset_version"] = dataset_version(DATA_FILE)
+    response_cache.clear()
+    set_progress("listo", 100)
+    global_context["status"] = "online"
+
+if BACKGROUND_LOAD:
+    threading.Thread(target=load_context, name="graph-loader", daemon=True).start()
+else:
+    load_context()
 
 # --- HELPERS ---
+def requires_graph(view):
+    """Responde 503 (con Retry-After) mientras el grafo no esté listo."""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        status = global_context["status"]
+        if status == "loading":
+            response = jsonify({"detail": "Datos cargando", "progress": global_context["progress"]})
+            response.headers["Retry-After"] = str(RETRY_AFTER_SECONDS)
+            return response, 503
+        if status == "error":
+            return jsonify({"detail": "Datos no cargados"}), 503
+        return view(*args, **kwargs)
+    return wrapper
+
+def cached_response(view):
+    """
+    Cachea la respuesta serializada por ruta+query y versión del dataset.
+    El ETag combina versión del dataset y URL; solo las respuestas 200 llevan
+    ETag y pueden contestarse con 304. Sirve gzip/brotli precomprimido y
+    agrupa peticiones idénticas en curso.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        version = global_context["dataset_version"]
+        key = (version, request.full_path)
+
+        def compute():
+            response = make_response(view(*args, **kwargs))
+            return CachedBody(response.status_code, response.get_data(), response.mimetype)
+
+        entry = response_cache.get_or_compute(key, compute)
+        etag = f"{version}-{response_etag(request.full_path)}" if entry.status == 200 else None
+        if etag and request.if_none_match.contains_weak(etag):
+            response = Response(status=304)
+        else:
+            body, encoding = entry.body_for(choose_encoding(request.headers.get("Accept-Encoding")))
+            response = Response(body, status=entry.status, mimetype=entry.mimetype)
+            if encoding:
+                response.headers["Content-Encoding"] = encoding
+        if etag:
+            response.set_etag(etag, weak=True)
+            response.headers["Cache-Control"] = "no-cache"
+        response.headers["Vary"] = "Accept-Encoding"
+        return response
+    return wrapper
+
 def get_real_name(name):
     if not name: return None
     return global_context["search_index"].get(name.lower().strip())
@@ -110,28 +210,34 @@ def get_real_name(name):
 
 @app.route('/', methods=['GET'])
 def read_root():
-    if global_context["G"]:
+    status = global_context["status"]
+    if status == "online":
         return jsonify({"status": "online", "nodes": global_context["G"].number_of_nodes()})
-    return jsonify({"status": "error", "detail": "Datos no cargados"}), 500
+    if status == "loading":
+        return jsonify({"status": "loading", "progress": global_context["progress"]})
+    return jsonify({"status": "error", "detail": global_context["error"] or "Datos no cargados"}), 500
 
 @app.route('/drugs/search', methods=['GET'])
+@requires_graph
+@cached_response
 def search_drugs():
     query = request.args.get('query', '').lower()
     matches = [name for name in global_context["search_index"].values() if query in name.lower()]
     return jsonify(matches[:20])
 
 @app.route('/drugs/<path:drug_name>', methods=['GET'])
+@requires_graph
+@cached_response
 def get_drug_details(drug_name):
     real_name = get_real_name(drug_name)
     if not real_name:
         return jsonify({"detail": "Medicamento no encontrado"}), 404
     
-    df = global_context["df"]
-    info = df[df['drug_name'] == real_name].iloc[0].to_dict()
-    clean_info = {k: (v if pd.notnull(v) else None) for k, v in info.items()}
-    return jsonify(clean_info)
+    table = global_context["table"]
+    return jsonify(table.record(table.row_of(real_name)))
 
 @app.route('/analysis/path', methods=['POST'])
+@requires_graph
 def get_shortest_path():
     data = request.get_json()
     if not data: return jsonify({"detail": "JSON inválido"}), 400
@@ -180,9 +286,12 @@ def get_shortest_path():
         return jsonify({"detail": str(e)}), 500
 
 @app.route('/analysis/alternatives/<path:drug_name>', methods=['GET'])
+@requires_graph
+@cached_response
 def get_alternatives(drug_name):
     top_n = int(request.args.get('top_n', 10))
     G = global_context["G"]
+    table = global_context["table"]
     real_name = get_real_name(drug_name)
     
     if not real_name:
@@ -198,26 +307,99 @@ def get_alternatives(drug_name):
         results.append({
             "name": neighbor_name,
             "similarity": data['similarity'],
-            "medical_condition": G.nodes[neighbor_name].get("medical_condition", "N/A")
+            "medical_condition": table.value(G.nodes[neighbor_name]["row"], "medical_condition") or "N/A"
         })
     return jsonify(results)
 
+@app.route('/analysis/neighborhood', methods=['POST'])
+@requires_graph
+def get_neighborhood():
+    """
+    Vecindario de varios medicamentos a la vez.
+    mode="intersection": similares a todos; mode="union": similares a alguno.
+    score = similitud acumulada / nº de medicamentos consultados.
+    """
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict) or not data: return jsonify({"detail": "JSON inválido"}), 400
+
+    drugs = data.get('drugs')
+    mode = data.get('mode', 'intersection')
+    try:
+        top_n = int(data.get('top_n', 10))
+    except (TypeError, ValueError):
+        return jsonify({"detail": "top_n debe ser un entero"}), 400
+
+    if not isinstance(drugs, list) or not drugs:
+        return jsonify({"detail": "'drugs' debe ser una lista no vacía"}), 400
+    if len(drugs) > NEIGHBORHOOD_MAX_DRUGS:
+        return jsonify({"detail": f"Máximo {NEIGHBORHOOD_MAX_DRUGS} medicamentos por consulta"}), 400
+    if mode not in ('intersection', 'union'):
+        return jsonify({"detail": "mode debe ser 'intersection' o 'union'"}), 400
+
+    table = global_context["table"]
+    neighbor_idx = global_context["neighbors"]
+
+    real_names = []
+    missing = []
+    for name in drugs:
+        real_name = get_real_name(name) if isinstance(name, str) else None
+        if real_name:
+            if real_name not in real_names: real_names.append(real_name)
+        else:
+            missing.append(name)
+    if missing:
+        return jsonify({"detail": "Medicamentos no encontrados", "missing": missing}), 404
+
+    rows = [table.row_of(name) for name in real_names]
+    if mode == 'intersection':
+        ids, total, lowest, counts = neighbor_idx.intersection(rows)
+    else:
+        ids, total, lowest, counts = neighbor_idx.union(rows)
+
+    # Los propios medicamentos consultados no son alternativas
+    keep = ~np.isin(ids, rows)
+    ids, total, lowest, counts = ids[keep], total[keep], lowest[keep], counts[keep]
+
+    scores = total / len(rows)
+    # Orden: mayor score y, a igualdad, más coincidencias
+    order = np.lexsort((-counts, -scores))[:max(top_n, 0)]
+
+    results = []
+    for i in order:
+        row = int(ids[i])
+        results.append({
+            "name": table.names[row],
+            "score": round(float(scores[i]), 4),
+            "matches": int(counts[i]),
+            "min_similarity": round(float(lowest[i]), 4),
+            "medical_condition": table.value(row, "medical_condition") or "N/A"
+        })
+
+    return jsonify({
+        "mode": mode,
+        "drugs": real_names,
+        "total": int(len(ids)),
+        "results": results
+    })
+
 @app.route('/drugs/filter', methods=['POST'])
+@requires_graph
 def filter_drugs():
     criteria = request.get_json() or {}
     print(f"🔍 Filtro Recibido: {criteria}")
     
-    df = global_context["df"]
+    table = global_context["table"]
     cache = global_context["filter_cache"]
     
     # 1. Verificar Cache Total
     cache_key = tuple(sorted(criteria.items()))
     if cache_key in cache:
         print("💡 Resultado obtenido desde el caché.")
-        results = cache[cache_key].head(100)
-        return json.loads(results.to_json(orient="records"))
+        return jsonify(table.records(cache[cache_key][:100]))
 
     # 2. Programación Dinámica (Cache por Columna)
+    # Cada predicado se evalúa sobre las categorías de la columna, no fila a fila,
+    # y se guarda el arreglo ordenado de ids de fila que lo cumplen.
     if "dp" not in cache: cache["dp"] = {}
     dp = cache["dp"]
     
@@ -233,43 +415,41 @@ def filter_drugs():
     if cond:
         val = cond.lower().strip()
         if ('condition', val) not in dp:
-            dp[('condition', val)] = df[df['medical_condition'].astype(str).str.contains(val, case=False, na=False)]
+            dp[('condition', val)] = table.rows_where('medical_condition', lambda v: val in v.lower())
         partial_results.append(dp[('condition', val)])
 
     # Procesar Pregnancy
     if preg:
         val = preg.upper().strip()
         if ('preg_cat', val) not in dp:
-            dp[('preg_cat', val)] = df[df['pregnancy_category'].astype(str).str.upper() == val]
+            dp[('preg_cat', val)] = table.rows_where('pregnancy_category', lambda v: v.upper() == val)
         partial_results.append(dp[('preg_cat', val)])
 
     # Procesar Rx
     if rx:
         val = rx.upper().strip()
         if ('rx_otc', val) not in dp:
-            dp[('rx_otc', val)] = df[df['rx_otc'].astype(str).str.upper().str.contains(val, na=False)]
+            dp[('rx_otc', val)] = table.rows_where('rx_otc', lambda v: val in v.upper())
         partial_results.append(dp[('rx_otc', val)])
 
     # Procesar CSA
     if csa_val:
         val = csa_val.upper().strip()
         if ('csa', val) not in dp:
-            dp[('csa', val)] = df[df['csa'].astype(str).str.upper() == val]
+            dp[('csa', val)] = table.rows_where('csa', lambda v: v.upper() == val)
         partial_results.append(dp[('csa', val)])
 
-    # 3. Intersección de Resultados
+    # 3. Intersección de Resultados (arreglos ordenados de ids)
     if not partial_results:
-        final = df.copy()
+        final = table.all_rows()
     else:
         final = partial_results[0]
         for sub in partial_results[1:]:
-            final = pd.merge(final, sub, how='inner', on=list(final.columns))
+            final = np.intersect1d(final, sub, assume_unique=True)
             
     # Guardar en cache y retornar
-    cache[cache_key] = final.copy() 
-    results = final.head(100)
-    
-    return json.loads(results.to_json(orient="records"))
+    cache[cache_key] = final
+    return jsonify(table.records(final[:100]))
 
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=8000, debug=True)
\ No newline at end of file
@@ -24,6 +24,9 @@ export default {
   getAlternatives(name) {
     return apiClient.get(`/analysis/alternatives/${name}`);
   },
+  getNeighborhood(drugs, mode = 'intersection', topN = 10) {
+    return apiClient.post('/analysis/neighborhood', { drugs, mode, top_n: topN });
+  },
   filterDrugs(criteria) {
     return apiClient.post('/drugs/filter', criteria);
   }
@@ -1,6 +1,4 @@
 import pandas as pd
-import networkx as nx
-import matplotlib.pyplot as plt
 import itertools
 import warnings
 from difflib import get_close_matches
@@ -8,6 +6,10 @@ from difflib import get_close_matches
 # Suprimir advertencias de Matplotlib (pueden ser ruidosas)
 warnings.filterwarnings("ignore", category=UserWarning)
 
+# networkx y matplotlib se importan dentro de las funciones que los usan:
+# matplotlib solo hace falta si el usuario pide un gráfico y networkx
+# no se carga hasta construir el grafo, así el arranque es más rápido.
+
 # --- Constantes y Configuración ---
 DATA_FILE = "drugs_side_effects_drugs_com.csv"
 
@@ -23,6 +25,8 @@ def load_and_build_graph():
     Carga el CSV, limpia los datos y construye el grafo guardando
     la razón de la conexión (Condición o Clase).
     """
+    import networkx as nx
+
     print(f"Cargando dataset desde '{DATA_FILE}'...")
 
     try:
@@ -41,9 +45,6 @@ def load_and_build_graph():
     except FileNotFoundError:
         print(f"--- ERROR ---: El archivo '{DATA_FILE}' no se encontró.")
         return None, None
-    except Exception as e:
-        print(f"--- ERROR INESPERADO ---: {e}")
-        return None, None
 
     print(f"Datos cargados. {len(df)} medicamentos únicos encontrados.")
     print("Construyendo grafo de relaciones...")
@@ -115,6 +116,8 @@ def get_drug_info(df, drug_name):
 
 
 def find_shortest_path(G, drug1, drug2, visualize=True):
+    import networkx as nx
+
     if drug1 not in G:
         print(f"Error: '{drug1}' no está en el grafo.")
         return
@@ -163,6 +166,9 @@ def find_shortest_path(G, drug1, drug2, visualize=True):
 
 
 def plot_dijkstra_path(G, path):
+    import networkx as nx
+    import matplotlib.pyplot as plt
+
     print("\nGenerando visualización...")
 
     nodes_to_include = set(path)
@@ -342,6 +348,9 @@ def filter_by_criteria(df, cache, **kwargs):
 
 
 def plot_alternatives_subgraph(G, origin_drug, alternative_nodes):
+    import networkx as nx
+    import matplotlib.pyplot as plt
+
     if not alternative_nodes:
         print("No hay alternativas para graficar.")
         return